@@ -1,19 +1,22 @@
 from flask import Flask
-from flask_cors import CORS
 
 from .config import Config
 from .extensions import db, jwt, migrate
+from .utils.json_provider import ORJSONProvider
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = ORJSONProvider(app)
 
     # Extensions
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
-    CORS(app)
+    if app.config.get('ENABLE_CORS'):
+        from flask_cors import CORS
+        CORS(app)
 
     # Register blueprints
     from .routes.auth import auth_bp
@@ -31,8 +34,8 @@ def create_app(config_class=Config):
     def create_admin():
         """Create initial admin account."""
         import click
-        from werkzeug.security import generate_password_hash
         from .models.user import User
+        from .utils.passwords import hash_password
 
         email = click.prompt('Admin email')
         password = click.prompt('Admin password', hide_input=True, confirmation_prompt=True)
@@ -45,7 +48,7 @@ def create_app(config_class=Config):
         else:
             admin = User(
                 email=email,
-                password_hash=generate_password_hash(password),
+                password_hash=hash_password(password),
                 is_admin=True,
             )
             db.session.add(admin)
@@ -1,9 +1,11 @@
 import os
 from datetime import timedelta
 
-from dotenv import load_dotenv
+# Production gets its environment injected; only read .env when present
+if os.getenv('FLASK_ENV') != 'production' and os.path.exists('.env'):
+    from dotenv import load_dotenv
 
-load_dotenv()
+    load_dotenv()
 
 
 class Config:
@@ -20,5 +22,23 @@ class Config:
         _db_url = _db_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = _db_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Managed Postgres drops idle connections: ping before use and recycle
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_timeout': 30,
+    }
+    if _db_url.startswith('postgresql://'):
+        SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'keepalives_count': 5,
+        }
 
     TRIAL_DURATION_DAYS = 3
+
+    # flask_cors is only imported when enabled (e.g. off for CLI/tests)
+    ENABLE_CORS = os.getenv('ENABLE_CORS', 'true').lower() in ('1', 'true', 'yes')
@@ -1,9 +1,18 @@
 from functools import wraps
 
-from flask import jsonify
+from flask import g, jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
-from ..models.user import User
+from ..utils.user_cache import get_cached_user
+
+
+def _current_user():
+    """Load the JWT user once per request; repeat calls reuse the cached row."""
+    user_id = int(get_jwt_identity())
+    cached = g.get('_auth_user')
+    if cached is None or cached[0] != user_id:
+        cached = g._auth_user = (user_id, get_cached_user(user_id))
+    return cached[1]
 
 
 def jwt_required_custom(fn):
@@ -11,8 +20,7 @@ def jwt_required_custom(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = _current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         if not user.is_active:
@@ -26,8 +34,7 @@ def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = _current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         if not user.is_active:
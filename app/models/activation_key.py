@@ -1,5 +1,3 @@
-from datetime import datetime, timezone
-
 from ..extensions import db
 
 
@@ -15,21 +13,54 @@ class ActivationKey(db.Model):
     # Filled on activation
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     activated_email = db.Column(db.String(255), nullable=True)
-    activated_at = db.Column(db.DateTime, nullable=True)
-    expires_at = db.Column(db.DateTime, nullable=True)
+    activated_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     # Sales tracking
     sold_to_name = db.Column(db.String(255), nullable=True)
     sold_to_email = db.Column(db.String(255), nullable=True)
-    sold_at = db.Column(db.DateTime, nullable=True)
+    sold_at = db.Column(db.DateTime(timezone=True), nullable=True)
     sold_price = db.Column(db.Numeric(10, 2), nullable=True)
     notes = db.Column(db.Text, nullable=True)
 
     # Admin who created the key
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+
+    # Never lazy-load per key: list views must join or eager-load the creator
+    creator = db.relationship(
+        'User', foreign_keys=[created_by], backref='created_keys', lazy='raise_on_sql',
+    )
 
-    creator = db.relationship('User', foreign_keys=[created_by], backref='created_keys')
+    __table_args__ = (
+        # Matches the "active key for user" predicate used by status checks
+        db.Index(
+            'idx_keys_active_user', 'user_id', 'expires_at',
+            postgresql_where=db.text("status = 'activated'"),
+        ),
+        db.Index('idx_keys_status', 'status'),
+        # Unfiltered user_id lookups: the admin user view's key list
+        # (filter_by(user_id=...)) and the ON DELETE SET NULL on users
+        db.Index('idx_keys_user', 'user_id'),
+        # Trigram indexes so the admin '%search%' ILIKE filters avoid seq scans
+        # (requires the pg_trgm extension)
+        db.Index(
+            'idx_keys_code_trgm', 'key_code',
+            postgresql_using='gin', postgresql_ops={'key_code': 'gin_trgm_ops'},
+        ),
+        db.Index(
+            'idx_keys_activated_email_trgm', 'activated_email',
+            postgresql_using='gin', postgresql_ops={'activated_email': 'gin_trgm_ops'},
+        ),
+        db.Index(
+            'idx_keys_sold_to_name_trgm', 'sold_to_name',
+            postgresql_using='gin', postgresql_ops={'sold_to_name': 'gin_trgm_ops'},
+        ),
+        db.Index(
+            'idx_keys_sold_to_email_trgm', 'sold_to_email',
+            postgresql_using='gin', postgresql_ops={'sold_to_email': 'gin_trgm_ops'},
+        ),
+    )
 
     def to_dict(self):
         return {
@@ -39,13 +70,13 @@ class ActivationKey(db.Model):
             'status': self.status,
             'user_id': self.user_id,
             'activated_email': self.activated_email,
-            'activated_at': self.activated_at.isoformat() if self.activated_at else None,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'activated_at': self.activated_at,
+            'expires_at': self.expires_at,
             'sold_to_name': self.sold_to_name,
             'sold_to_email': self.sold_to_email,
-            'sold_at': self.sold_at.isoformat() if self.sold_at else None,
-            'sold_price': float(self.sold_price) if self.sold_price else None,
+            'sold_at': self.sold_at,
+            'sold_price': self.sold_price,
             'notes': self.notes,
             'created_by': self.created_by,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
@@ -1,5 +1,3 @@
-from datetime import datetime, timezone
-
 from ..extensions import db
 
 
@@ -12,17 +10,32 @@ class CloudProduct(db.Model):
     name_full = db.Column(db.Text, nullable=False)
     barcode = db.Column(db.String(50), nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at = db.Column(
-        db.DateTime,
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc),
+        db.DateTime(timezone=True),
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
     )
 
     __table_args__ = (
         db.Index('idx_cloud_products_db', 'database_id'),
         db.Index('idx_cloud_products_barcode', 'database_id', 'barcode'),
         db.Index('idx_cloud_products_name', 'database_id', 'name_kz'),
+        # Trigram indexes for the '%search%' ILIKE filters in list_products;
+        # one per column so the planner can BitmapOr the three predicates
+        # (requires the pg_trgm extension)
+        db.Index(
+            'idx_cloud_products_name_kz_trgm', 'name_kz',
+            postgresql_using='gin', postgresql_ops={'name_kz': 'gin_trgm_ops'},
+        ),
+        db.Index(
+            'idx_cloud_products_name_full_trgm', 'name_full',
+            postgresql_using='gin', postgresql_ops={'name_full': 'gin_trgm_ops'},
+        ),
+        db.Index(
+            'idx_cloud_products_barcode_trgm', 'barcode',
+            postgresql_using='gin', postgresql_ops={'barcode': 'gin_trgm_ops'},
+        ),
     )
 
     def to_dict(self):
@@ -32,7 +45,7 @@ class CloudProduct(db.Model):
             'name_kz': self.name_kz,
             'name_full': self.name_full,
             'barcode': self.barcode,
-            'price': float(self.price),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'price': self.price,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
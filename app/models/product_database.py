@@ -1,6 +1,5 @@
-from datetime import datetime, timezone
-
 from ..extensions import db
+from .cloud_product import CloudProduct
 
 
 class ProductDatabase(db.Model):
@@ -10,14 +9,23 @@ class ProductDatabase(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at = db.Column(
-        db.DateTime,
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc),
+        db.DateTime(timezone=True),
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
     )
 
     products = db.relationship('CloudProduct', backref='database', lazy='dynamic', cascade='all, delete-orphan')
+    # Deferred so a lone to_dict() counts on demand; list queries undefer it
+    # to fetch every count in the same SELECT
+    product_count = db.column_property(
+        db.select(db.func.count(CloudProduct.id))
+        .where(CloudProduct.database_id == id)
+        .correlate_except(CloudProduct)
+        .scalar_subquery(),
+        deferred=True,
+    )
 
     def to_dict(self):
         return {
@@ -25,7 +33,7 @@ class ProductDatabase(db.Model):
             'user_id': self.user_id,
             'name': self.name,
             'description': self.description,
-            'product_count': self.products.count(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'product_count': self.product_count,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
@@ -1,64 +1,82 @@
-from datetime import datetime, timedelta, timezone
-
 from flask import Blueprint, jsonify, request
 
 from ..extensions import db
 from ..middleware.auth_required import jwt_required_custom
 from ..models.activation_key import ActivationKey
 from ..models.device import Device
+from ..utils.activation import claim_activation_key
+from ..utils.cache import status_cache
+from ..utils.time import utcnow
 
 activation_bp = Blueprint('activation', __name__)
 
 
-@activation_bp.route('/status', methods=['GET'])
-@jwt_required_custom
-def status(user):
-    """Check activation status for the current user's account."""
-    # Admins always have access
-    if user.is_admin:
-        return jsonify({
-            'status': 'active',
-            'days_remaining': 999,
-        }), 200
-
-    now = datetime.utcnow()
-
-    # Check for active activation key (account-based)
-    active_key = ActivationKey.query.filter(
-        ActivationKey.user_id == user.id,
-        ActivationKey.status == 'activated',
-        ActivationKey.expires_at > now,
+def _status_payload(user, now):
+    """Build the /status response body for a non-admin user."""
+    # Check for active activation key (account-based); only the columns
+    # the response needs are selected, no ORM instance is built
+    active_key = db.session.execute(
+        db.select(
+            ActivationKey.key_code,
+            ActivationKey.activated_email,
+            ActivationKey.activated_at,
+            ActivationKey.expires_at,
+        ).where(
+            ActivationKey.user_id == user.id,
+            ActivationKey.status == 'activated',
+            ActivationKey.expires_at > now,
+        ).limit(1)
     ).first()
 
     if active_key:
         days_remaining = (active_key.expires_at - now).days
-        return jsonify({
+        return {
             'status': 'active',
             'key_code': active_key.key_code,
             'email': active_key.activated_email,
             'activated_at': active_key.activated_at.isoformat() if active_key.activated_at else None,
             'expires_at': active_key.expires_at.isoformat(),
             'days_remaining': max(0, days_remaining),
-        }), 200
+        }
 
     # Check for active trial on any device
-    active_trial = Device.query.filter(
-        Device.user_id == user.id,
-        Device.trial_expires_at > now,
-    ).first()
-
-    if active_trial:
-        days_remaining = (active_trial.trial_expires_at - now).days
-        return jsonify({
+    trial_expires_at = db.session.scalar(
+        db.select(Device.trial_expires_at).where(
+            Device.user_id == user.id,
+            Device.trial_expires_at > now,
+        ).limit(1)
+    )
+
+    if trial_expires_at:
+        days_remaining = (trial_expires_at - now).days
+        return {
             'status': 'trial',
-            'expires_at': active_trial.trial_expires_at.isoformat(),
+            'expires_at': trial_expires_at.isoformat(),
             'days_remaining': max(0, days_remaining),
-        }), 200
+        }
 
-    return jsonify({
+    return {
         'status': 'expired',
         'days_remaining': 0,
-    }), 200
+    }
+
+
+@activation_bp.route('/status', methods=['GET'])
+@jwt_required_custom
+def status(user):
+    """Check activation status for the current user's account."""
+    # Admins always have access
+    if user.is_admin:
+        return jsonify({
+            'status': 'active',
+            'days_remaining': 999,
+        }), 200
+
+    payload = status_cache.get(user.id)
+    if payload is None:
+        payload = _status_payload(user, utcnow())
+        status_cache.set(user.id, payload)
+    return jsonify(payload), 200
 
 
 @activation_bp.route('/activate', methods=['POST'])
@@ -73,44 +91,35 @@ def activate(user):
     if not key_code:
         return jsonify({'error': 'Key code is required'}), 400
 
-    # Find the key
-    key = ActivationKey.query.filter_by(key_code=key_code).first()
+    now = utcnow()
+    key = claim_activation_key(user, now, ActivationKey.key_code == key_code)
     if not key:
-        return jsonify({'error': 'Invalid activation key'}), 404
-
-    if key.status == 'activated':
-        return jsonify({'error': 'This key has already been activated'}), 409
-    if key.status == 'revoked':
-        return jsonify({'error': 'This key has been revoked'}), 409
-    if key.status not in ('available', 'sold'):
+        # Rare path: look up why the key could not be claimed
+        key_status = db.session.scalar(
+            db.select(ActivationKey.status).where(ActivationKey.key_code == key_code)
+        )
+        if key_status is None:
+            return jsonify({'error': 'Invalid activation key'}), 404
+        if key_status == 'activated':
+            return jsonify({'error': 'This key has already been activated'}), 409
+        if key_status == 'revoked':
+            return jsonify({'error': 'This key has been revoked'}), 409
         return jsonify({'error': 'This key cannot be activated'}), 400
 
-    # Check if user already has an active key
-    now = datetime.utcnow()
-    existing_active = ActivationKey.query.filter(
-        ActivationKey.user_id == user.id,
-        ActivationKey.status == 'activated',
-        ActivationKey.expires_at > now,
-    ).first()
-
-    # Activate the key (account-based)
-    key.user_id = user.id
-    key.activated_email = user.email
-    key.activated_at = now
-    key.expires_at = now + timedelta(days=key.duration_days)
-    key.status = 'activated'
+    activation = {
+        'status': 'active',
+        'key_code': key.key_code,
+        'email': key.activated_email,
+        'activated_at': key.activated_at.isoformat(),
+        'expires_at': key.expires_at.isoformat(),
+        'days_remaining': key.duration_days,
+    }
     db.session.commit()
+    status_cache.invalidate(user.id)
 
     return jsonify({
         'message': 'Key activated successfully',
-        'activation': {
-            'status': 'active',
-            'key_code': key.key_code,
-            'email': key.activated_email,
-            'activated_at': key.activated_at.isoformat(),
-            'expires_at': key.expires_at.isoformat(),
-            'days_remaining': key.duration_days,
-        },
+        'activation': activation,
     }), 200
 
 
@@ -1,68 +1,102 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 
 from flask import Blueprint, jsonify, request
 
-from werkzeug.security import generate_password_hash
-
 from ..extensions import db
 from ..middleware.auth_required import admin_required
 from ..models.activation_key import ActivationKey
 from ..models.device import Device
 from ..models.product_database import ProductDatabase
 from ..models.user import User
+from ..utils.activation import claim_activation_key
+from ..utils.cache import status_cache, user_cache
 from ..utils.key_generator import generate_activation_key
+from ..utils.passwords import hash_password
+from ..utils.time import utcnow
 
 admin_bp = Blueprint('admin', __name__)
 
 
+def _activation_statuses(users, now):
+    """Map user id -> (activation_status, expires_at) using one query per table."""
+    # Admins are always active, so only client ids go into the bulk lookups
+    ids = [u.id for u in users if not u.is_admin]
+    key_expires = {}
+    trial_expires = {}
+    if ids:
+        key_expires = dict(db.session.execute(
+            db.select(ActivationKey.user_id, db.func.max(ActivationKey.expires_at))
+            .where(
+                ActivationKey.user_id.in_(ids),
+                ActivationKey.status == 'activated',
+                ActivationKey.expires_at > now,
+            )
+            .group_by(ActivationKey.user_id)
+        ).all())
+        trial_expires = dict(db.session.execute(
+            db.select(Device.user_id, db.func.max(Device.trial_expires_at))
+            .where(
+                Device.user_id.in_(ids),
+                Device.trial_expires_at > now,
+            )
+            .group_by(Device.user_id)
+        ).all())
+
+    statuses = {}
+    for u in users:
+        if u.is_admin:
+            statuses[u.id] = ('active', None)
+        elif u.id in key_expires:
+            statuses[u.id] = ('active', key_expires[u.id])
+        elif u.id in trial_expires:
+            statuses[u.id] = ('trial', trial_expires[u.id])
+        else:
+            statuses[u.id] = ('expired', None)
+    return statuses
+
+
 # --- Stats ---
 
 @admin_bp.route('/stats', methods=['GET'])
 @admin_required
 def stats(user):
-    now = datetime.utcnow()
+    now = utcnow()
+
+    # All counters come from two aggregate queries: one over users (with the
+    # trial count as a scalar subquery) and one over activation_keys.
+    active_trials_sq = db.select(
+        db.func.count(db.distinct(Device.user_id))
+    ).where(Device.trial_expires_at > now).scalar_subquery()
+
+    total_users, admin_count, active_trials = db.session.execute(db.select(
+        db.func.count(User.id),
+        db.func.count(User.id).filter(User.is_admin.is_(True)),
+        active_trials_sq,
+    )).one()
+
+    total_keys, available_keys, sold_keys, active_keys, revenue = db.session.execute(db.select(
+        db.func.count(ActivationKey.id),
+        db.func.count(ActivationKey.id).filter(ActivationKey.status == 'available'),
+        db.func.count(ActivationKey.id).filter(ActivationKey.status == 'sold'),
+        db.func.count(ActivationKey.id).filter(
+            ActivationKey.status == 'activated',
+            ActivationKey.expires_at > now,
+        ),
+        db.func.coalesce(db.func.sum(ActivationKey.sold_price), 0),
+    )).one()
 
-    total_users = User.query.count()
-    active_trials = Device.query.filter(Device.trial_expires_at > now).distinct(Device.user_id).count()
-    active_keys = ActivationKey.query.filter(
-        ActivationKey.status == 'activated',
-        ActivationKey.expires_at > now,
-    ).count()
-    admin_count = User.query.filter_by(is_admin=True).count()
     expired_users = total_users - active_trials - active_keys - admin_count
-    total_keys = ActivationKey.query.count()
-    available_keys = ActivationKey.query.filter_by(status='available').count()
-    sold_keys = ActivationKey.query.filter_by(status='sold').count()
-
-    revenue = db.session.query(
-        db.func.coalesce(db.func.sum(ActivationKey.sold_price), 0)
-    ).filter(ActivationKey.sold_price.isnot(None)).scalar()
 
-    recent_users = User.query.filter(User.id != 1).order_by(User.created_at.desc()).limit(10).all()
+    recent_users = db.session.scalars(
+        db.select(User).where(User.id != 1).order_by(User.created_at.desc()).limit(10)
+    ).all()
 
     # Compute activation status for each recent user
+    statuses = _activation_statuses(recent_users, now)
     recent_users_data = []
     for u in recent_users:
         u_dict = u.to_dict()
-        if u.is_admin:
-            u_dict['activation_status'] = 'active'
-        else:
-            active_key = ActivationKey.query.filter(
-                ActivationKey.user_id == u.id,
-                ActivationKey.status == 'activated',
-                ActivationKey.expires_at > now,
-            ).first()
-            if active_key:
-                u_dict['activation_status'] = 'active'
-            else:
-                trial = Device.query.filter(
-                    Device.user_id == u.id,
-                    Device.trial_expires_at > now,
-                ).first()
-                if trial:
-                    u_dict['activation_status'] = 'trial'
-                else:
-                    u_dict['activation_status'] = 'expired'
+        u_dict['activation_status'] = statuses[u.id][0]
         recent_users_data.append(u_dict)
 
     return jsonify({
@@ -104,37 +138,14 @@ def list_users(user):
     query = query.order_by(User.created_at.desc())
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    now = datetime.utcnow()
+    now = utcnow()
+    statuses = _activation_statuses(pagination.items, now)
     users_data = []
     for u in pagination.items:
         u_dict = u.to_dict()
-
-        # Determine activation status
-        if u.is_admin:
-            u_dict['activation_status'] = 'active'
-            u_dict['activation_expires'] = None
-        else:
-            active_key = ActivationKey.query.filter(
-                ActivationKey.user_id == u.id,
-                ActivationKey.status == 'activated',
-                ActivationKey.expires_at > now,
-            ).first()
-
-            if active_key:
-                u_dict['activation_status'] = 'active'
-                u_dict['activation_expires'] = active_key.expires_at.isoformat()
-            else:
-                trial = Device.query.filter(
-                    Device.user_id == u.id,
-                    Device.trial_expires_at > now,
-                ).first()
-                if trial:
-                    u_dict['activation_status'] = 'trial'
-                    u_dict['activation_expires'] = trial.trial_expires_at.isoformat()
-                else:
-                    u_dict['activation_status'] = 'expired'
-                    u_dict['activation_expires'] = None
-
+        activation_status, activation_expires = statuses[u.id]
+        u_dict['activation_status'] = activation_status
+        u_dict['activation_expires'] = activation_expires.isoformat() if activation_expires else None
         users_data.append(u_dict)
 
     # Apply status filter after computing statuses
@@ -161,36 +172,29 @@ def get_user(admin, user_id):
     if not target:
         return jsonify({'error': 'User not found'}), 404
 
-    now = datetime.utcnow()
-    devices = Device.query.filter_by(user_id=user_id).all()
-    keys = ActivationKey.query.filter_by(user_id=user_id).all()
-    databases = ProductDatabase.query.filter_by(user_id=user_id).all()
+    # Nested lists are capped (newest first) so long-lived accounts stay bounded
+    devices_limit = max(1, min(request.args.get('devices_limit', 20, type=int), 500))
+    keys_limit = max(1, min(request.args.get('keys_limit', 50, type=int), 500))
+    databases_limit = max(1, min(request.args.get('databases_limit', 50, type=int), 500))
+
+    now = utcnow()
+    devices = Device.query.filter_by(user_id=user_id).order_by(
+        Device.created_at.desc()
+    ).limit(devices_limit).all()
+    keys = ActivationKey.query.filter_by(user_id=user_id).order_by(
+        ActivationKey.activated_at.desc().nulls_last()
+    ).limit(keys_limit).all()
+    databases = ProductDatabase.query.options(
+        db.undefer(ProductDatabase.product_count),
+    ).filter_by(user_id=user_id).order_by(
+        ProductDatabase.updated_at.desc()
+    ).limit(databases_limit).all()
 
     # Compute activation status
     user_dict = target.to_dict()
-    if target.is_admin:
-        user_dict['activation_status'] = 'active'
-        user_dict['activation_expires'] = None
-    else:
-        active_key = ActivationKey.query.filter(
-            ActivationKey.user_id == target.id,
-            ActivationKey.status == 'activated',
-            ActivationKey.expires_at > now,
-        ).first()
-        if active_key:
-            user_dict['activation_status'] = 'active'
-            user_dict['activation_expires'] = active_key.expires_at.isoformat()
-        else:
-            trial = Device.query.filter(
-                Device.user_id == target.id,
-                Device.trial_expires_at > now,
-            ).first()
-            if trial:
-                user_dict['activation_status'] = 'trial'
-                user_dict['activation_expires'] = trial.trial_expires_at.isoformat()
-            else:
-                user_dict['activation_status'] = 'expired'
-                user_dict['activation_expires'] = None
+    activation_status, activation_expires = _activation_statuses([target], now)[target.id]
+    user_dict['activation_status'] = activation_status
+    user_dict['activation_expires'] = activation_expires.isoformat() if activation_expires else None
 
     return jsonify({
         'user': user_dict,
@@ -221,9 +225,11 @@ def update_user(admin, user_id):
         new_password = data['password'].strip()
         if len(new_password) < 6:
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
-        target.password_hash = generate_password_hash(new_password)
+        target.password_hash = hash_password(new_password)
 
     db.session.commit()
+    user_cache.invalidate(user_id)
+    status_cache.invalidate(user_id)
     return jsonify(target.to_dict()), 200
 
 
@@ -245,7 +251,7 @@ def extend_license(admin, user_id):
     if not days or days < 1:
         return jsonify({'error': 'days must be a positive number'}), 400
 
-    now = datetime.utcnow()
+    now = utcnow()
 
     # Find activated key for this user
     key = ActivationKey.query.filter(
@@ -267,6 +273,7 @@ def extend_license(admin, user_id):
         key.duration_days = days
 
     db.session.commit()
+    status_cache.invalidate(user_id)
     return jsonify({
         'message': f'License extended by {days} days',
         'key': key.to_dict(),
@@ -291,34 +298,49 @@ def assign_key(admin, user_id):
     key_code = data.get('key_code')
 
     if key_code:
-        key = ActivationKey.query.filter_by(key_code=key_code.strip().upper()).first()
+        key_filter = ActivationKey.key_code == key_code.strip().upper()
     elif key_id:
-        key = ActivationKey.query.get(key_id)
+        key_filter = ActivationKey.id == key_id
     else:
         return jsonify({'error': 'key_id or key_code is required'}), 400
 
+    now = utcnow()
+    key = claim_activation_key(target, now, key_filter)
     if not key:
-        return jsonify({'error': 'Key not found'}), 404
-
-    if key.status not in ('available', 'sold'):
+        if not db.session.query(ActivationKey.id).filter(key_filter).first():
+            return jsonify({'error': 'Key not found'}), 404
         return jsonify({'error': 'Ключ уже использован или отозван'}), 400
 
-    now = datetime.utcnow()
-    key.user_id = target.id
-    key.activated_email = target.email
-    key.activated_at = now
-    key.expires_at = now + timedelta(days=key.duration_days)
-    key.status = 'activated'
-
+    key_data = key.to_dict()
     db.session.commit()
+    status_cache.invalidate(target.id)
     return jsonify({
         'message': 'Ключ успешно назначен',
-        'key': key.to_dict(),
+        'key': key_data,
     }), 200
 
 
 # --- Activation Keys ---
 
+_KEY_LIST_COLUMNS = (
+    ActivationKey.id,
+    ActivationKey.key_code,
+    ActivationKey.duration_days,
+    ActivationKey.status,
+    ActivationKey.user_id,
+    ActivationKey.activated_email,
+    ActivationKey.activated_at,
+    ActivationKey.expires_at,
+    ActivationKey.sold_to_name,
+    ActivationKey.sold_to_email,
+    ActivationKey.sold_at,
+    ActivationKey.sold_price,
+    ActivationKey.notes,
+    ActivationKey.created_by,
+    ActivationKey.created_at,
+)
+
+
 @admin_bp.route('/keys', methods=['GET'])
 @admin_required
 def list_keys(user):
@@ -328,10 +350,16 @@ def list_keys(user):
     per_page = request.args.get('per_page', 20, type=int)
     per_page = min(per_page, 100)
 
-    query = ActivationKey.query
+    # Project plain columns instead of hydrating ActivationKey instances
+    query = db.session.query(*_KEY_LIST_COLUMNS)
+    if request.args.get('include_creator', '').lower() in ('1', 'true'):
+        # Creator email comes from the same query, not one lookup per key
+        query = query.add_columns(User.email.label('creator_email')).outerjoin(
+            User, User.id == ActivationKey.created_by
+        )
 
     if status_filter:
-        query = query.filter_by(status=status_filter)
+        query = query.filter(ActivationKey.status == status_filter)
     if search:
         query = query.filter(
             db.or_(
@@ -342,11 +370,11 @@ def list_keys(user):
             )
         )
 
-    query = query.order_by(ActivationKey.created_at.desc())
+    query = query.order_by(ActivationKey.created_at.desc(), ActivationKey.id.desc())
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
     return jsonify({
-        'keys': [k.to_dict() for k in pagination.items],
+        'keys': [dict(row._mapping) for row in pagination.items],
         'total': pagination.total,
         'page': pagination.page,
         'pages': pagination.pages,
@@ -368,7 +396,7 @@ def generate_keys(admin_user):
     sold_price = data.get('sold_price')
     notes = data.get('notes', '').strip() or None
 
-    now = datetime.utcnow()
+    now = utcnow()
     initial_status = 'available'
     sold_at = None
 
@@ -377,26 +405,29 @@ def generate_keys(admin_user):
         initial_status = 'sold'
         sold_at = now
 
-    keys = []
-    for _ in range(count):
-        key = ActivationKey(
-            key_code=generate_activation_key(),
-            duration_days=duration_days,
-            status=initial_status,
-            sold_to_name=sold_to_name,
-            sold_to_email=sold_to_email,
-            sold_at=sold_at,
-            sold_price=sold_price,
-            notes=notes,
-            created_by=admin_user.id,
-        )
-        db.session.add(key)
-        keys.append(key)
+    rows = [
+        {
+            'key_code': generate_activation_key(),
+            'duration_days': duration_days,
+            'status': initial_status,
+            'sold_to_name': sold_to_name,
+            'sold_to_email': sold_to_email,
+            'sold_at': sold_at,
+            'sold_price': sold_price,
+            'notes': notes,
+            'created_by': admin_user.id,
+        }
+        for _ in range(count)
+    ]
+    # Single multi-row INSERT ... RETURNING instead of one INSERT per key
+    keys = db.session.scalars(db.insert(ActivationKey).returning(ActivationKey), rows).all()
+    # Serialize before commit, which would expire the returned rows
+    keys_data = [k.to_dict() for k in keys]
 
     db.session.commit()
     return jsonify({
-        'message': f'{len(keys)} key(s) generated',
-        'keys': [k.to_dict() for k in keys],
+        'message': f'{len(keys_data)} key(s) generated',
+        'keys': keys_data,
     }), 201
 
 
@@ -411,7 +442,9 @@ def update_key(user, key_id):
     if not data:
         return jsonify({'error': 'Request body required'}), 400
 
-    now = datetime.utcnow()
+    now = utcnow()
+    # Remember the owner: revoking the key clears user_id
+    owner_id = key.user_id
 
     if 'status' in data:
         new_status = data['status']
@@ -421,7 +454,7 @@ def update_key(user, key_id):
                 Device.query.filter(
                     Device.user_id == key.user_id,
                     Device.trial_expires_at > now,
-                ).update({Device.trial_expires_at: now})
+                ).update({Device.trial_expires_at: now}, synchronize_session=False)
             key.status = 'revoked'
             key.user_id = None
             key.activated_email = None
@@ -447,6 +480,7 @@ def update_key(user, key_id):
             key.expires_at = key.activated_at + timedelta(days=new_duration)
 
     db.session.commit()
+    status_cache.invalidate(owner_id)
     return jsonify(key.to_dict()), 200
 
 
@@ -457,6 +491,8 @@ def delete_key(user, key_id):
     if not key:
         return jsonify({'error': 'Key not found'}), 404
 
+    owner_id = key.user_id
     db.session.delete(key)
     db.session.commit()
+    status_cache.invalidate(owner_id)
     return jsonify({'message': 'Key deleted'}), 200
@@ -1,30 +1,45 @@
-from datetime import datetime, timedelta, timezone
+import random
+from datetime import timedelta
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
     get_jwt_identity,
     jwt_required,
 )
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from ..extensions import db
 from ..middleware.auth_required import jwt_required_custom
 from ..models.activation_key import ActivationKey
 from ..models.device import Device
 from ..models.user import User
+from ..utils.passwords import hash_password, password_needs_rehash, verify_password
+from ..utils.time import utcnow
+from ..utils.user_cache import get_cached_user
 from ..utils.validators import validate_email, validate_password
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def _create_access_token(user_id):
+    """Access token with ±10% lifetime jitter so simultaneous logins don't refresh in lockstep."""
+    expires = current_app.config['JWT_ACCESS_TOKEN_EXPIRES'] * random.uniform(0.9, 1.1)
+    return create_access_token(identity=str(user_id), expires_delta=expires)
+
+
+# Checked for unknown emails so they cost the same as a wrong password. Built
+# at import so no request pays for it; argon2 is the slowest method in use,
+# while unmigrated werkzeug (scrypt) hashes still verify slightly faster.
+_DUMMY_PASSWORD_HASH = hash_password('dummy-password')
+
+
 def _get_activation_status(user):
     """Get activation status for a user (account-based, not device-based)."""
     if user.is_admin:
         return {'status': 'active', 'days_remaining': 999}
 
-    now = datetime.utcnow()
+    now = utcnow()
 
     # Check for active activation key
     active_key = ActivationKey.query.filter(
@@ -84,12 +99,14 @@ def register():
         return jsonify({'error': 'Platform must be android or web'}), 400
 
     # Check email uniqueness
-    if User.query.filter_by(email=email).first():
+    if db.session.scalar(db.select(db.exists().where(User.email == email))):
         return jsonify({'error': 'Email already registered'}), 409
 
     # Check device trial
-    existing_device = Device.query.filter_by(device_id=device_id, platform=platform).first()
-    if existing_device:
+    device_used = db.session.scalar(db.select(db.exists().where(
+        Device.device_id == device_id, Device.platform == platform,
+    )))
+    if device_used:
         return jsonify({
             'error': 'This device has already been used for a trial period',
             'trial_used': True,
@@ -98,14 +115,13 @@ def register():
     # Create user
     user = User(
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=hash_password(password),
     )
     db.session.add(user)
     db.session.flush()
 
     # Create device with trial
-    now = datetime.utcnow()
-    from flask import current_app
+    now = utcnow()
     trial_days = current_app.config.get('TRIAL_DURATION_DAYS', 3)
 
     device = Device(
@@ -118,7 +134,7 @@ def register():
     db.session.add(device)
     db.session.commit()
 
-    access_token = create_access_token(identity=str(user.id))
+    access_token = _create_access_token(user.id)
     refresh_token = create_refresh_token(identity=str(user.id))
 
     return jsonify({
@@ -144,34 +160,49 @@ def login():
         return jsonify({'error': 'Email and password are required'}), 400
 
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    # Always run one hash check so response time doesn't reveal whether the email exists
+    password_hash = user.password_hash if user else _DUMMY_PASSWORD_HASH
+    password_ok = verify_password(password_hash, password)
+    if user is None or not password_ok:
         return jsonify({'error': 'Invalid email or password'}), 401
 
     if not user.is_active:
         return jsonify({'error': 'Account disabled'}), 403
 
+    # Upgrade legacy werkzeug hashes while the plaintext is at hand
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+
+    # Serialize before the commit below expires the user; a device
+    # registered here never carries a live trial.
+    user_data = user.to_dict()
+    activation = _get_activation_status(user)
+
     # Register device if new (but don't create a trial — trial is only on registration)
     if device_id and platform:
-        existing_device = Device.query.filter_by(device_id=device_id, platform=platform).first()
-        if not existing_device:
+        device_known = db.session.scalar(db.select(db.exists().where(
+            Device.device_id == device_id, Device.platform == platform,
+        )))
+        if not device_known:
+            now = utcnow()
             device = Device(
                 user_id=user.id,
                 device_id=device_id,
                 platform=platform,
-                trial_started_at=datetime.utcnow(),
-                trial_expires_at=datetime.utcnow(),
+                trial_started_at=now,
+                trial_expires_at=now,
             )
             db.session.add(device)
-            db.session.commit()
+    db.session.commit()
 
-    access_token = create_access_token(identity=str(user.id))
+    access_token = _create_access_token(user.id)
     refresh_token = create_refresh_token(identity=str(user.id))
 
     return jsonify({
-        'user': user.to_dict(),
+        'user': user_data,
         'access_token': access_token,
         'refresh_token': refresh_token,
-        'activation': _get_activation_status(user),
+        'activation': activation,
     }), 200
 
 
@@ -188,9 +219,9 @@ def me(user):
 @jwt_required(refresh=True)
 def refresh():
     user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    user = get_cached_user(int(user_id))
     if not user or not user.is_active:
         return jsonify({'error': 'Account disabled'}), 403
 
-    access_token = create_access_token(identity=str(user_id))
+    access_token = _create_access_token(user_id)
     return jsonify({'access_token': access_token}), 200
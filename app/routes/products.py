@@ -1,17 +1,21 @@
 import csv
 import io
-from datetime import datetime, timezone
+import math
 
 import requests
-from flask import Blueprint, Response, jsonify, request
+import urllib3
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 
 from ..extensions import db
 from ..middleware.auth_required import jwt_required_custom
 from ..models.cloud_product import CloudProduct
 from ..models.product_database import ProductDatabase
+from ..utils.cache import product_count_cache
 
 products_bp = Blueprint('products', __name__)
 
+IMPORT_BATCH_SIZE = 1000
+
 
 def _check_db_ownership(user, db_id):
     """Get a database and verify the user owns it."""
@@ -23,12 +27,31 @@ def _check_db_ownership(user, db_id):
     return pdb, None
 
 
+def _get_owned_product(user, db_id, product_id):
+    """Get a product in one query that also verifies database ownership."""
+    product = CloudProduct.query.join(ProductDatabase).filter(
+        CloudProduct.id == product_id,
+        CloudProduct.database_id == db_id,
+        ProductDatabase.user_id == user.id,
+    ).first()
+    if product:
+        return product, None
+
+    # Only the error path pays for telling 403 from 404
+    pdb, error = _check_db_ownership(user, db_id)
+    if error:
+        return None, error
+    return None, (jsonify({'error': 'Product not found'}), 404)
+
+
 # --- Databases ---
 
 @products_bp.route('/databases', methods=['GET'])
 @jwt_required_custom
 def list_databases(user):
-    databases = ProductDatabase.query.filter_by(user_id=user.id).order_by(
+    databases = ProductDatabase.query.options(
+        db.undefer(ProductDatabase.product_count),
+    ).filter_by(user_id=user.id).order_by(
         ProductDatabase.updated_at.desc()
     ).all()
     return jsonify([d.to_dict() for d in databases]), 200
@@ -85,6 +108,7 @@ def delete_database(user, db_id):
 
     db.session.delete(pdb)
     db.session.commit()
+    product_count_cache.invalidate(db_id)
     return jsonify({'message': 'Database deleted'}), 200
 
 
@@ -115,13 +139,20 @@ def list_products(user, db_id):
         )
 
     query = query.order_by(CloudProduct.name_kz)
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Reuse a recent total so paging doesn't repeat the COUNT(*) each time
+    total = product_count_cache.get(db_id, {}).get(search)
+    pagination = query.paginate(
+        page=page, per_page=per_page, error_out=False, count=total is None,
+    )
+    if total is None:
+        total = pagination.total
+        product_count_cache.setdefault(db_id, {})[search] = total
 
     return jsonify({
         'products': [p.to_dict() for p in pagination.items],
-        'total': pagination.total,
+        'total': total,
         'page': pagination.page,
-        'pages': pagination.pages,
+        'pages': math.ceil(total / pagination.per_page),
         'per_page': per_page,
     }), 200
 
@@ -139,7 +170,7 @@ def add_products(user, db_id):
 
     # Support single product or array
     products_data = data if isinstance(data, list) else [data]
-    created = []
+    rows = []
 
     for item in products_data:
         name_kz = item.get('name_kz', '').strip()
@@ -150,34 +181,41 @@ def add_products(user, db_id):
         if not barcode:
             continue
 
-        product = CloudProduct(
-            database_id=db_id,
-            name_kz=name_kz or '',
-            name_full=name_full or '',
-            barcode=barcode,
-            price=price,
+        rows.append({
+            'database_id': db_id,
+            'name_kz': name_kz or '',
+            'name_full': name_full or '',
+            'barcode': barcode,
+            'price': price,
+        })
+
+    created = []
+    if rows:
+        # Single multi-row INSERT ... RETURNING instead of one INSERT per product;
+        # only ids and barcodes go back since the client sent the rest
+        result = db.session.execute(
+            db.insert(CloudProduct).returning(
+                CloudProduct.id, CloudProduct.barcode, sort_by_parameter_order=True,
+            ),
+            rows,
         )
-        db.session.add(product)
-        created.append(product)
+        created = [{'id': product_id, 'barcode': barcode} for product_id, barcode in result]
 
     db.session.commit()
+    product_count_cache.invalidate(db_id)
     return jsonify({
         'message': f'{len(created)} product(s) added',
-        'products': [p.to_dict() for p in created],
+        'products': created,
     }), 201
 
 
 @products_bp.route('/databases/<int:db_id>/products/<int:product_id>', methods=['PUT'])
 @jwt_required_custom
 def update_product(user, db_id, product_id):
-    pdb, error = _check_db_ownership(user, db_id)
+    product, error = _get_owned_product(user, db_id, product_id)
     if error:
         return error
 
-    product = CloudProduct.query.filter_by(id=product_id, database_id=db_id).first()
-    if not product:
-        return jsonify({'error': 'Product not found'}), 404
-
     data = request.get_json()
     if not data:
         return jsonify({'error': 'Request body required'}), 400
@@ -192,22 +230,20 @@ def update_product(user, db_id, product_id):
         product.price = data['price']
 
     db.session.commit()
+    product_count_cache.invalidate(db_id)
     return jsonify(product.to_dict()), 200
 
 
 @products_bp.route('/databases/<int:db_id>/products/<int:product_id>', methods=['DELETE'])
 @jwt_required_custom
 def delete_product(user, db_id, product_id):
-    pdb, error = _check_db_ownership(user, db_id)
+    product, error = _get_owned_product(user, db_id, product_id)
     if error:
         return error
 
-    product = CloudProduct.query.filter_by(id=product_id, database_id=db_id).first()
-    if not product:
-        return jsonify({'error': 'Product not found'}), 404
-
     db.session.delete(product)
     db.session.commit()
+    product_count_cache.invalidate(db_id)
     return jsonify({'message': 'Product deleted'}), 200
 
 
@@ -232,33 +268,52 @@ def import_csv(user, db_id):
     if not csv_url and not csv_data:
         return jsonify({'error': 'csv_url or csv_data is required'}), 400
 
+    resp = None
     try:
         if csv_url:
-            resp = requests.get(csv_url, timeout=30)
+            resp = requests.get(csv_url, timeout=30, stream=True)
             resp.raise_for_status()
-            raw = resp.content.decode('utf-8-sig')
+            # Decode strictly (bad bytes fail the import) and keep line
+            # endings so csv.reader sees quoted multi-line fields intact
+            resp.raw.decode_content = True
+            # Let TextIOWrapper see EOF instead of a closed stream
+            resp.raw.auto_close = False
+            lines = io.TextIOWrapper(resp.raw, encoding='utf-8-sig', newline='')
         else:
-            raw = csv_data
+            lines = io.StringIO(csv_data, newline='')
 
-        # Auto-detect delimiter
-        first_line = raw.split('\n')[0] if raw else ''
+        # Auto-detect delimiter from the header, which is consumed here
+        first_line = next(lines, '')
         delimiter = ';' if ';' in first_line else ','
 
-        reader = csv.reader(io.StringIO(raw), delimiter=delimiter)
-        rows = list(reader)
-
-        if len(rows) < 2:
-            return jsonify({'error': 'CSV must have header + at least one data row'}), 400
-
-        # Skip header
-        products = []
-        for row in rows[1:]:
+        reader = csv.reader(lines, delimiter=delimiter)
+
+        # With replace_all the old rows are deleted right before the first
+        # insert, so no row locks are held while the first batch downloads
+        pending_delete = replace_all
+
+        def write_batch(batch):
+            nonlocal pending_delete
+            if pending_delete:
+                CloudProduct.query.filter_by(database_id=db_id).delete()
+                pending_delete = False
+            if batch:
+                db.session.execute(db.insert(CloudProduct), batch)
+
+        # Rows are parsed lazily and inserted per batch, so memory stays
+        # bounded by IMPORT_BATCH_SIZE rather than the file size
+        has_rows = False
+        batch = []
+        total = 0
+        for row in reader:
+            has_rows = True
             if len(row) < 5:
                 continue
+            _, name_full, name_kz, barcode, raw_price = row[:5]
 
-            barcode = row[3].strip()
+            barcode = barcode.strip()
             # Handle scientific notation (e.g., 2.022E+12)
-            if barcode and ('e' in barcode.lower() or 'E' in barcode):
+            if 'e' in barcode or 'E' in barcode:
                 try:
                     barcode = str(int(float(barcode)))
                 except (ValueError, OverflowError):
@@ -268,36 +323,46 @@ def import_csv(user, db_id):
                 continue
 
             try:
-                price = float(row[4].strip().replace(',', '.'))
-            except (ValueError, IndexError):
+                price = float(raw_price.strip().replace(',', '.'))
+            except ValueError:
                 price = 0.0
 
-            products.append(CloudProduct(
-                database_id=db_id,
-                name_full=row[1].strip() if len(row) > 1 else '',
-                name_kz=row[2].strip() if len(row) > 2 else '',
-                barcode=barcode,
-                price=price,
-            ))
-
-        if replace_all:
-            CloudProduct.query.filter_by(database_id=db_id).delete()
+            batch.append({
+                'database_id': db_id,
+                'name_full': name_full.strip(),
+                'name_kz': name_kz.strip(),
+                'barcode': barcode,
+                'price': price,
+            })
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                write_batch(batch)
+                total += len(batch)
+                batch = []
+
+        if not has_rows:
+            db.session.rollback()
+            return jsonify({'error': 'CSV must have header + at least one data row'}), 400
 
-        for p in products:
-            db.session.add(p)
+        write_batch(batch)
+        total += len(batch)
 
         db.session.commit()
+        product_count_cache.invalidate(db_id)
 
         return jsonify({
-            'message': f'{len(products)} products imported',
-            'total': len(products),
+            'message': f'{total} products imported',
+            'total': total,
         }), 200
 
-    except requests.RequestException as e:
+    except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+        db.session.rollback()
         return jsonify({'error': f'Failed to fetch CSV: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Import failed: {str(e)}'}), 500
+    finally:
+        if resp is not None:
+            resp.close()
 
 
 @products_bp.route('/databases/<int:db_id>/export-csv', methods=['GET'])
@@ -307,16 +372,28 @@ def export_csv(user, db_id):
     if error:
         return error
 
-    products = CloudProduct.query.filter_by(database_id=db_id).order_by(CloudProduct.name_kz).all()
+    rows = db.session.query(
+        CloudProduct.name_full, CloudProduct.name_kz, CloudProduct.barcode, CloudProduct.price,
+    ).filter_by(database_id=db_id).order_by(CloudProduct.name_kz).yield_per(1000)
+
+    def generate():
+        # Server-side cursor + one reused line buffer keeps memory flat
+        line = io.StringIO()
+        writer = csv.writer(line, delimiter=';')
+
+        def render(values):
+            writer.writerow(values)
+            chunk = line.getvalue()
+            line.seek(0)
+            line.truncate()
+            return chunk
 
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
-    writer.writerow(['#', 'Name', 'NameKZ', 'Barcode', 'Price'])
-    for i, p in enumerate(products, 1):
-        writer.writerow([i, p.name_full, p.name_kz, p.barcode, float(p.price)])
+        yield render(['#', 'Name', 'NameKZ', 'Barcode', 'Price'])
+        for i, (name_full, name_kz, barcode, price) in enumerate(rows, 1):
+            yield render([i, name_full, name_kz, barcode, float(price)])
 
     return Response(
-        output.getvalue(),
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': f'attachment; filename={pdb.name}.csv'},
     )
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from ..extensions import db
+from ..models.activation_key import ActivationKey
+
+# Key statuses that may still be activated
+ACTIVATABLE_STATUSES = ('available', 'sold')
+
+
+def claim_activation_key(user, now, *criteria):
+    """Atomically activate the key matching ``criteria`` for ``user``.
+
+    Runs a single conditional UPDATE ... RETURNING, so two concurrent
+    activations of the same key cannot both succeed. Returns the activated
+    key, or None if no activatable key matched.
+    """
+    stmt = (
+        db.update(ActivationKey)
+        .where(*criteria, ActivationKey.status.in_(ACTIVATABLE_STATUSES))
+        .values(
+            user_id=user.id,
+            activated_email=user.email,
+            activated_at=now,
+            expires_at=now + ActivationKey.duration_days * timedelta(days=1),
+            status='activated',
+        )
+        .returning(ActivationKey)
+    )
+    return db.session.scalars(stmt).one_or_none()
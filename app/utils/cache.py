@@ -0,0 +1,44 @@
+import threading
+
+from cachetools import TTLCache
+
+
+class LockedTTLCache:
+    """Per-process TTL cache that is safe to share between worker threads."""
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def setdefault(self, key, default):
+        with self._lock:
+            return self._cache.setdefault(key, default)
+
+    def invalidate(self, key):
+        if key is None:
+            return
+        with self._lock:
+            self._cache.pop(key, None)
+
+
+# user_id -> /status payload. Activation state changes on the scale of days,
+# so polling clients can be served a payload up to a minute old; routes that
+# change a user's activation invalidate it.
+status_cache = LockedTTLCache(maxsize=10_000, ttl=60)
+
+# user_id -> detached User (see user_cache.get_cached_user). Admin edits
+# invalidate it, so disabling an account applies immediately in that process
+# and within the TTL everywhere else.
+user_cache = LockedTTLCache(maxsize=10_000, ttl=30)
+
+# db_id -> {search: total} for product list pagination; the TTL runs from the
+# first cached search. Routes that add, edit or remove products invalidate it.
+product_count_cache = LockedTTLCache(maxsize=10_000, ttl=15)
@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+
+def _default(obj):
+    # orjson handles datetime natively but not Decimal (Numeric columns)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson; datetimes are emitted as ISO 8601."""
+
+    option = orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self.option)
+        return self._app.response_class(body, mimetype='application/json')
@@ -3,8 +3,19 @@ import secrets
 # Exclude ambiguous characters: O/0, I/1, L
 CHARS = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
 
+# Largest multiple of len(CHARS) that fits in a byte; bytes at or above it
+# are rejected so every character stays equally likely
+_BYTE_LIMIT = 256 - 256 % len(CHARS)
+
 
 def generate_activation_key():
     """Generate a key like XXXX-XXXX-XXXX-XXXX."""
-    groups = [''.join(secrets.choice(CHARS) for _ in range(4)) for _ in range(4)]
-    return '-'.join(groups)
+    chars = []
+    while len(chars) < 16:
+        # One urandom draw per batch instead of one per character
+        for b in secrets.token_bytes(24):
+            if b < _BYTE_LIMIT:
+                chars.append(CHARS[b % len(CHARS)])
+                if len(chars) == 16:
+                    break
+    return '-'.join(''.join(chars[i:i + 4]) for i in range(0, 16, 4))
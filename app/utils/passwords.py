@@ -0,0 +1,30 @@
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from werkzeug.security import check_password_hash
+
+# Argon2id with tuned parameters replaces werkzeug's default method (scrypt
+# in Werkzeug 3.x) for new hashes. Existing werkzeug hashes of any method
+# still verify and are upgraded on the next successful login.
+_hasher = PasswordHasher(time_cost=2, memory_cost=64_000, parallelism=2)
+_ARGON2_PREFIX = '$argon2'
+
+
+def hash_password(password):
+    return _hasher.hash(password)
+
+
+def verify_password(password_hash, password):
+    """Check a password against an argon2 or legacy werkzeug hash."""
+    if not password_hash.startswith(_ARGON2_PREFIX):
+        return check_password_hash(password_hash, password)
+    try:
+        return _hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(password_hash):
+    """True for legacy hashes and argon2 hashes with outdated parameters."""
+    if not password_hash.startswith(_ARGON2_PREFIX):
+        return True
+    return _hasher.check_needs_rehash(password_hash)
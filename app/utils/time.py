@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def utcnow():
+    """Current time as a timezone-aware UTC datetime."""
+    return datetime.now(timezone.utc)
@@ -0,0 +1,17 @@
+from ..extensions import db
+from ..models.user import User
+from .cache import user_cache
+
+
+def get_cached_user(user_id):
+    """Return the User bound to the current session, or None if missing."""
+    cached = user_cache.get(user_id)
+    if cached is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        # Keep a detached snapshot so commits in this session can't expire it
+        db.session.expunge(user)
+        cached = user
+        user_cache.set(user_id, cached)
+    return db.session.merge(cached, load=False)
@@ -0,0 +1,32 @@
+"""add cloud product trigram indexes
+
+Revision ID: 3e8a5d71c2b9
+Revises: 7c4e2b9d1f03
+Create Date: 2026-10-15 09:31:05.667230
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8a5d71c2b9'
+down_revision = '7c4e2b9d1f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm is normally installed by 9b1e4c7d2a60 already
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.batch_alter_table('cloud_products', schema=None) as batch_op:
+        batch_op.create_index('idx_cloud_products_name_kz_trgm', ['name_kz'], unique=False, postgresql_using='gin', postgresql_ops={'name_kz': 'gin_trgm_ops'})
+        batch_op.create_index('idx_cloud_products_name_full_trgm', ['name_full'], unique=False, postgresql_using='gin', postgresql_ops={'name_full': 'gin_trgm_ops'})
+        batch_op.create_index('idx_cloud_products_barcode_trgm', ['barcode'], unique=False, postgresql_using='gin', postgresql_ops={'barcode': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('cloud_products', schema=None) as batch_op:
+        batch_op.drop_index('idx_cloud_products_barcode_trgm', postgresql_using='gin', postgresql_ops={'barcode': 'gin_trgm_ops'})
+        batch_op.drop_index('idx_cloud_products_name_full_trgm', postgresql_using='gin', postgresql_ops={'name_full': 'gin_trgm_ops'})
+        batch_op.drop_index('idx_cloud_products_name_kz_trgm', postgresql_using='gin', postgresql_ops={'name_kz': 'gin_trgm_ops'})
@@ -0,0 +1,45 @@
+"""add timestamp server defaults
+
+Revision ID: 5f8a2c91d4e7
+Revises: 2d30446371c3
+Create Date: 2026-10-15 08:31:52.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f8a2c91d4e7'
+down_revision = '2d30446371c3'
+branch_labels = None
+depends_on = None
+
+# table -> columns filled by now() on insert
+TIMESTAMP_DEFAULTS = {
+    'users': ['created_at', 'updated_at'],
+    'activation_keys': ['created_at'],
+    'devices': ['trial_started_at', 'created_at'],
+    'product_databases': ['created_at', 'updated_at'],
+    'cloud_products': ['created_at', 'updated_at'],
+}
+
+
+def upgrade():
+    for table, columns in TIMESTAMP_DEFAULTS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column,
+                       existing_type=sa.DateTime(timezone=True),
+                       existing_nullable=True,
+                       server_default=sa.text('now()'))
+
+
+def downgrade():
+    for table, columns in TIMESTAMP_DEFAULTS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column,
+                       existing_type=sa.DateTime(timezone=True),
+                       existing_nullable=True,
+                       server_default=None)
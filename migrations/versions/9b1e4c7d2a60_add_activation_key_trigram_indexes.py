@@ -0,0 +1,35 @@
+"""add activation key trigram indexes
+
+Revision ID: 9b1e4c7d2a60
+Revises: 683cff1a2b45
+Create Date: 2026-10-15 08:02:11.418305
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e4c7d2a60'
+down_revision = '683cff1a2b45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.batch_alter_table('activation_keys', schema=None) as batch_op:
+        batch_op.create_index('idx_keys_code_trgm', ['key_code'], unique=False, postgresql_using='gin', postgresql_ops={'key_code': 'gin_trgm_ops'})
+        batch_op.create_index('idx_keys_activated_email_trgm', ['activated_email'], unique=False, postgresql_using='gin', postgresql_ops={'activated_email': 'gin_trgm_ops'})
+        batch_op.create_index('idx_keys_sold_to_name_trgm', ['sold_to_name'], unique=False, postgresql_using='gin', postgresql_ops={'sold_to_name': 'gin_trgm_ops'})
+        batch_op.create_index('idx_keys_sold_to_email_trgm', ['sold_to_email'], unique=False, postgresql_using='gin', postgresql_ops={'sold_to_email': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('activation_keys', schema=None) as batch_op:
+        batch_op.drop_index('idx_keys_sold_to_email_trgm', postgresql_using='gin', postgresql_ops={'sold_to_email': 'gin_trgm_ops'})
+        batch_op.drop_index('idx_keys_sold_to_name_trgm', postgresql_using='gin', postgresql_ops={'sold_to_name': 'gin_trgm_ops'})
+        batch_op.drop_index('idx_keys_activated_email_trgm', postgresql_using='gin', postgresql_ops={'activated_email': 'gin_trgm_ops'})
+        batch_op.drop_index('idx_keys_code_trgm', postgresql_using='gin', postgresql_ops={'key_code': 'gin_trgm_ops'})
+
+    # pg_trgm is left installed; other objects may depend on it